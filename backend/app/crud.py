@@ -0,0 +1,36 @@
+from typing import List
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Property
+
+
+_UPSERT_CHUNK = 500
+
+# Never overwritten on conflict: identity/bookkeeping columns plus the
+# generated price_per_m2 column, which Postgres computes itself.
+_UPSERT_IMMUTABLE = {"id", "external_id", "uuid", "created_at", "price_per_m2"}
+
+
+async def bulk_upsert_properties(db: AsyncSession, rows: List[dict]) -> None:
+    """Upsert property rows with INSERT ... ON CONFLICT (external_id) DO UPDATE.
+
+    Executes one statement per chunk of 500 rows instead of a select/insert
+    round trip per row. Rows must be homogeneous dicts of Property column
+    values; the caller handles the commit.
+    """
+    for start in range(0, len(rows), _UPSERT_CHUNK):
+        chunk = rows[start:start + _UPSERT_CHUNK]
+        stmt = insert(Property).values(chunk)
+        set_ = {
+            c.name: stmt.excluded[c.name]
+            for c in Property.__table__.columns
+            if c.name not in _UPSERT_IMMUTABLE and c.name in chunk[0]
+        }
+        # The ORM-level onupdate only fires for ORM/Core UPDATEs, not the
+        # DO UPDATE branch, so stamp updated_at explicitly here
+        set_["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(index_elements=["external_id"], set_=set_)
+        await db.execute(stmt)
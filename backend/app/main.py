@@ -1,35 +1,50 @@
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .db import init_db
 from .routers.properties import router as properties_router
 from .routers.scrape import router as scrape_router
 from .services.scheduler import start_scheduler, stop_scheduler
+from .services.scraper.fetch import aclose_client
 
+# uvloop is picked up by uvicorn itself (loop="auto" with uvicorn[standard]);
+# installing it here would run after uvicorn has already entered its loop.
+# The requirements pin is what makes it available.
 
-def create_app() -> FastAPI:
-    app = FastAPI(title="OptiHome API", version="0.1.0")
+# Parsed once at import instead of per create_app call
+CORS_ORIGINS = os.getenv("CORS_ORIGINS", "").split(",") if os.getenv("CORS_ORIGINS") else ["*"]
+
+# Set to "0" to skip create_all on boot (e.g. when the schema is managed
+# externally); saves the per-table information_schema round trips on cold start
+AUTO_CREATE_TABLES = os.getenv("AUTO_CREATE_TABLES", "1") == "1"
 
-    origins = []
-    import os
 
-    cors_origins = os.getenv("CORS_ORIGINS", "").split(",") if os.getenv("CORS_ORIGINS") else ["*"]
+def create_app() -> FastAPI:
+    # orjson serializes the float-heavy listing/Pareto payloads several times
+    # faster than the stdlib encoder
+    app = FastAPI(title="OptiHome API", version="0.1.0", default_response_class=ORJSONResponse)
+
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=cors_origins,
+        allow_origins=CORS_ORIGINS,
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
     )
 
     @app.on_event("startup")
-    def on_startup() -> None:
-        init_db()
+    async def on_startup() -> None:
+        if AUTO_CREATE_TABLES:
+            await init_db()
         start_scheduler()
 
     @app.on_event("shutdown")
-    def on_shutdown() -> None:
+    async def on_shutdown() -> None:
         stop_scheduler()
+        await aclose_client()
 
     app.include_router(properties_router, prefix="/properties", tags=["properties"])
     app.include_router(scrape_router, prefix="/scrape", tags=["scrape"])
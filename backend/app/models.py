@@ -1,6 +1,6 @@
 from uuid import UUID as UUIDType, uuid4
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Computed, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -9,6 +9,38 @@ from .db import Base
 
 class Property(Base):
     __tablename__ = "properties"
+    __table_args__ = (
+        # Covering index for the skyline NOT EXISTS anti-join: leads with the
+        # always-filtered type/is_active columns, covers all four dominance
+        # objectives, and includes id so the inner scan is index-only.
+        # Trigram GIN index so the leading-wildcard ILIKE '%loc%' location
+        # filter uses an index scan instead of a seq scan; requires the
+        # pg_trgm extension (created in init_db).
+        Index(
+            "ix_properties_address_trgm",
+            "address",
+            postgresql_using="gin",
+            postgresql_ops={"address": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_properties_skyline",
+            "type",
+            "is_active",
+            "price_eur",
+            "price_per_m2",
+            "rooms",
+            "year_built",
+            postgresql_include=["id"],
+        ),
+        # Partial indexes for the hot listing path: nearly every request
+        # filters is_active=true, so keep the frequent predicates in small
+        # active-only indexes that stay buffer-resident.
+        Index("ix_properties_active_price", "price_eur", postgresql_where=text("is_active")),
+        Index("ix_properties_active_type_rooms", "type", "rooms", postgresql_where=text("is_active")),
+        Index("ix_properties_active_ppm2", "price_per_m2", postgresql_where=text("is_active")),
+        # Soft-delete anti-join filters WHERE type = :k AND external_id NOT IN (...)
+        Index("ix_properties_type_extid", "type", "external_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     uuid: Mapped[UUIDType | None] = mapped_column(UUID(as_uuid=True), unique=True, index=True, nullable=True, default=uuid4)
@@ -19,18 +51,42 @@ class Property(Base):
     price_eur: Mapped[float | None] = mapped_column(Float, index=True, nullable=True)
     area_m2: Mapped[float | None] = mapped_column(Float, nullable=True)
     rooms: Mapped[int | None] = mapped_column(Integer, index=True, nullable=True)
-    price_per_m2: Mapped[float | None] = mapped_column(Float, index=True, nullable=True)
+    # Generated in Postgres at write time; never set from Python. Zero (not
+    # NULL) when the area is missing/zero, matching the old Python-side
+    # validator — the response schemas require a float and NULLs would be
+    # incomparable in the skyline dominance join.
+    price_per_m2: Mapped[float | None] = mapped_column(
+        Float,
+        Computed("CASE WHEN area_m2 > 0 THEN price_eur / area_m2 ELSE 0 END", persisted=True),
+        index=True,
+        nullable=True,
+    )
     year_built: Mapped[int | None] = mapped_column(Integer, index=True, nullable=True)
     address: Mapped[str | None] = mapped_column(String(512), nullable=True)
     lat: Mapped[float | None] = mapped_column(Float, nullable=True, index=True)
     lng: Mapped[float | None] = mapped_column(Float, nullable=True, index=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, index=True, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Stamped on every upsert; the scraper soft-deletes rows whose stamp
+    # predates the current run instead of shipping all seen ids back
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    # Timestamps are set by Postgres (server_default / SQL-side onupdate), not
+    # computed in Python per statement
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
 
+# Functional GiST index over the built-in point type (plain postgres:15, no
+# PostGIS) so bbox containment filters become R-tree lookups instead of four
+# scalar range comparisons per row.
+Index(
+    "ix_properties_geom",
+    func.point(Property.lng, Property.lat),
+    postgresql_using="gist",
+)
+
+
 class GeocodeCache(Base):
     __tablename__ = "geocode_cache"
 
@@ -39,7 +95,7 @@ class GeocodeCache(Base):
     query: Mapped[str] = mapped_column(String(512), unique=True, index=True)
     lat: Mapped[float] = mapped_column(Float)
     lng: Mapped[float] = mapped_column(Float)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 
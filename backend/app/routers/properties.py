@@ -1,22 +1,75 @@
+import hashlib
+from collections import OrderedDict
 from typing import Optional, List
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+import orjson
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, exists, and_, or_, lambda_stmt
 
-from ..db import get_db
+from ..db import SessionLocal, get_db
 from ..models import Property
 from ..schemas import PropertiesResponse, PropertyOut, ParetoResponse, ParetoItem
-from ..services.pareto import skyline
 from ..services.geocode import geocode_with_cache
+from ..services.data_version import get_version
 
 
 router = APIRouter()
 
 
-@router.get("", response_model=PropertiesResponse)
-def list_properties(
-    db: Session = Depends(get_db),
-    type: Optional[str] = Query(None, pattern="^(flat|house)$"),
+def _etag_for(request: Request) -> str:
+    """Weak ETag keyed on the dataset version and the full query string."""
+    key = f"{get_version()}:{request.url.query}"
+    return 'W/"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+
+
+def _not_modified(request: Request, response: Response) -> bool:
+    """Set the ETag header; True when the client's copy is still fresh."""
+    etag = _etag_for(request)
+    response.headers["ETag"] = etag
+    return request.headers.get("if-none-match") == etag
+
+
+# Survivor ids of recent Pareto queries, keyed by (dataset version, filters).
+# Entries for stale versions simply stop being hit and age out via LRU, so no
+# explicit invalidation is needed.
+_PARETO_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+_PARETO_CACHE_MAX = 256
+
+
+def _pareto_cache_get(key: tuple):
+    ids = _PARETO_CACHE.get(key)
+    if ids is not None:
+        _PARETO_CACHE.move_to_end(key)
+    return ids
+
+
+def _pareto_cache_put(key: tuple, ids: tuple) -> None:
+    _PARETO_CACHE[key] = ids
+    _PARETO_CACHE.move_to_end(key)
+    while len(_PARETO_CACHE) > _PARETO_CACHE_MAX:
+        _PARETO_CACHE.popitem(last=False)
+
+
+def _bbox_clause(entity, bbox: str):
+    """Containment test against the functional GiST index on point(lng, lat).
+
+    Returns None when the bbox string is malformed, matching the old
+    silently-ignored behaviour.
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = map(float, bbox.split(","))
+    except Exception:
+        return None
+    return func.point(entity.lng, entity.lat).op("<@")(
+        func.box(func.point(min_lng, min_lat), func.point(max_lng, max_lat))
+    )
+
+
+def _filter_conds(
+    entity,
+    type: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     min_rooms: Optional[int] = None,
@@ -25,73 +78,232 @@ def list_properties(
     max_area: Optional[float] = None,
     min_year: Optional[int] = None,
     max_year: Optional[int] = None,
-    location: Optional[str] = Query(None, description="Filter by location (case-insensitive substring match on address)"),
-    bbox: Optional[str] = Query(
-        None, description="minLng,minLat,maxLng,maxLat"
-    ),
-    onlyPareto: bool = False,
+    location: Optional[str] = None,
+    bbox: Optional[str] = None,
     include_inactive: bool = False,
-    offset: int = 0,
-    limit: int = 100,
+) -> list:
+    """Build the list of filter conditions for a Property (or alias thereof).
+
+    Shared by both endpoints and the dominance subquery so the ladder lives in
+    exactly one place and each statement gets a single .where() call.
+    """
+    conds = []
+    if not include_inactive:
+        conds.append(entity.is_active == True)
+    if type:
+        conds.append(entity.type == type)
+    if min_price is not None:
+        conds.append(entity.price_eur >= min_price)
+    if max_price is not None:
+        conds.append(entity.price_eur <= max_price)
+    if min_rooms is not None:
+        conds.append(entity.rooms >= min_rooms)
+    if max_rooms is not None:
+        conds.append(entity.rooms <= max_rooms)
+    if min_area is not None:
+        conds.append(entity.area_m2 >= min_area)
+    if max_area is not None:
+        conds.append(entity.area_m2 <= max_area)
+    if min_year is not None:
+        conds.append(entity.year_built >= min_year)
+    if max_year is not None:
+        conds.append(entity.year_built <= max_year)
+    if location:
+        conds.append(entity.address.ilike(f"%{location}%"))
+    if bbox:
+        clause = _bbox_clause(entity, bbox)
+        if clause is not None:
+            conds.append(clause)
+    return conds
+
+
+def _listing_stmt(
+    type: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    min_rooms: Optional[int],
+    max_rooms: Optional[int],
+    min_area: Optional[float],
+    max_area: Optional[float],
+    min_year: Optional[int],
+    max_year: Optional[int],
+    location: Optional[str],
+    bbox: Optional[str],
+    include_inactive: bool,
+    offset: int,
+    limit: int,
 ):
-    q = select(Property)
-    # Filter by active status unless explicitly including inactive
+    """lambda_stmt-cached statement for the plain listing path.
+
+    Each criterion is its own lambda so the compiled-SQL cache is keyed by the
+    permutation of present filters while the values stay bind parameters. This
+    necessarily repeats the _filter_conds ladder: lambda caching needs one
+    code object per optional criterion.
+    """
+    stmt = lambda_stmt(lambda: select(Property))
     if not include_inactive:
-        q = q.where(Property.is_active == True)
+        stmt += lambda s: s.where(Property.is_active == True)
     if type:
-        q = q.where(Property.type == type)
+        stmt += lambda s: s.where(Property.type == type)
     if min_price is not None:
-        q = q.where(Property.price_eur >= min_price)
+        stmt += lambda s: s.where(Property.price_eur >= min_price)
     if max_price is not None:
-        q = q.where(Property.price_eur <= max_price)
+        stmt += lambda s: s.where(Property.price_eur <= max_price)
     if min_rooms is not None:
-        q = q.where(Property.rooms >= min_rooms)
+        stmt += lambda s: s.where(Property.rooms >= min_rooms)
     if max_rooms is not None:
-        q = q.where(Property.rooms <= max_rooms)
+        stmt += lambda s: s.where(Property.rooms <= max_rooms)
     if min_area is not None:
-        q = q.where(Property.area_m2 >= min_area)
+        stmt += lambda s: s.where(Property.area_m2 >= min_area)
     if max_area is not None:
-        q = q.where(Property.area_m2 <= max_area)
+        stmt += lambda s: s.where(Property.area_m2 <= max_area)
     if min_year is not None:
-        q = q.where(Property.year_built >= min_year)
+        stmt += lambda s: s.where(Property.year_built >= min_year)
     if max_year is not None:
-        q = q.where(Property.year_built <= max_year)
+        stmt += lambda s: s.where(Property.year_built <= max_year)
     if location:
-        q = q.where(Property.address.ilike(f"%{location}%"))
+        pattern = f"%{location}%"
+        stmt += lambda s: s.where(Property.address.ilike(pattern))
     if bbox:
         try:
             min_lng, min_lat, max_lng, max_lat = map(float, bbox.split(","))
-            q = q.where(
-                Property.lat >= min_lat,
-                Property.lat <= max_lat,
-                Property.lng >= min_lng,
-                Property.lng <= max_lng,
-            )
         except Exception:
             pass
+        else:
+            stmt += lambda s: s.where(
+                func.point(Property.lng, Property.lat).op("<@")(
+                    func.box(func.point(min_lng, min_lat), func.point(max_lng, max_lat))
+                )
+            )
+    stmt += lambda s: s.offset(offset).limit(limit)
+    return stmt
 
-    total = db.execute(select(func.count()).select_from(q.subquery())).scalar_one()
 
+def _not_dominated(**filters):
+    """Correlated NOT EXISTS clause selecting only Pareto-optimal rows.
+
+    The dominance check runs inside Postgres so only the skyline comes back
+    over the wire; the same user filters are applied to the inner alias so
+    dominance is judged within the filtered candidate set.
+    """
+    other = aliased(Property)
+    conds = _filter_conds(other, **filters)
+
+    other_year = func.coalesce(other.year_built, -1)
+    self_year = func.coalesce(Property.year_built, -1)
+    dominates = and_(
+        other.price_eur <= Property.price_eur,
+        other.price_per_m2 <= Property.price_per_m2,
+        other.rooms >= Property.rooms,
+        other_year >= self_year,
+        or_(
+            other.price_eur < Property.price_eur,
+            other.price_per_m2 < Property.price_per_m2,
+            other.rooms > Property.rooms,
+            other_year > self_year,
+        ),
+    )
+    return ~exists(select(other.id).where(*conds, dominates))
+
+
+@router.get("", response_model=PropertiesResponse)
+async def list_properties(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    type: Optional[str] = Query(None, pattern="^(flat|house)$"),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rooms: Optional[int] = None,
+    max_rooms: Optional[int] = None,
+    min_area: Optional[float] = None,
+    max_area: Optional[float] = None,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    location: Optional[str] = Query(None, description="Filter by location (case-insensitive substring match on address)"),
+    bbox: Optional[str] = Query(
+        None, description="minLng,minLat,maxLng,maxLat"
+    ),
+    onlyPareto: bool = False,
+    include_inactive: bool = False,
+    offset: int = 0,
+    limit: int = 100,
+    with_total: bool = Query(False, description="Run the extra COUNT(*) query for the exact total"),
+):
+    if _not_modified(request, response):
+        # Returning a Response directly bypasses the injected `response`, so
+        # the validator must be echoed here explicitly (RFC 7232 §4.1)
+        return Response(status_code=304, headers={"ETag": response.headers["ETag"]})
+    filters = dict(
+        type=type,
+        min_price=min_price,
+        max_price=max_price,
+        min_rooms=min_rooms,
+        max_rooms=max_rooms,
+        min_area=min_area,
+        max_area=max_area,
+        min_year=min_year,
+        max_year=max_year,
+        location=location,
+        bbox=bbox,
+        include_inactive=include_inactive,
+    )
     if onlyPareto:
-        rows = db.execute(q).scalars().all()
-        recs = [
-            (r.id, r.price_eur, r.price_per_m2, r.rooms, r.year_built)
-            for r in rows
-        ]
-        ids = set(skyline(recs))
-        rows = [r for r in rows if r.id in ids]
+        # Run the dominance anti-join over an id-only candidate query (an
+        # index-only scan on the skyline index), then hydrate just the
+        # survivors — still a single round trip.
+        sky_ids = select(Property.id).where(
+            *_filter_conds(Property, **filters), _not_dominated(**filters)
+        )
+        rows = (
+            await db.execute(select(Property).where(Property.id.in_(sky_ids)))
+        ).scalars().all()
         items: List[PropertyOut] = [PropertyOut.model_validate(r) for r in rows]
         return PropertiesResponse(items=items, total=len(items))
 
-    q = q.offset(offset).limit(limit)
-    rows = db.execute(q).scalars().all()
-    items: List[PropertyOut] = [PropertyOut.model_validate(r) for r in rows]
-    return PropertiesResponse(items=items, total=total)
+    # The COUNT(*) over the filtered set costs as much as the data query
+    # itself, so only pay for it when the client asks.
+    exact_total: Optional[int] = None
+    if with_total:
+        count_q = select(func.count()).select_from(
+            select(Property).where(*_filter_conds(Property, **filters)).subquery()
+        )
+        exact_total = (await db.execute(count_q)).scalar_one()
+
+    # Hot path: statement shape is memoized via lambda_stmt, only the bind
+    # values vary between requests. Rows are streamed from a server-side
+    # cursor and encoded per row, so peak memory stays at ~one row and the
+    # first bytes go out before the result set is exhausted.
+    q = _listing_stmt(offset=offset, limit=limit, **filters)
+
+    async def _body():
+        yield b'{"items":['
+        count = 0
+        # The request-scoped session is torn down before the streaming body
+        # runs (yield-dependency cleanup precedes body execution), so the
+        # cursor needs a session owned by the generator itself — otherwise
+        # every request checks out a pooled connection that is never returned
+        async with SessionLocal() as session:
+            result = await session.stream(q, execution_options={"yield_per": 500})
+            async for row in result.scalars():
+                chunk = orjson.dumps(PropertyOut.model_validate(row).model_dump(mode="json"))
+                yield b"," + chunk if count else chunk
+                count += 1
+        total = exact_total if exact_total is not None else offset + count
+        yield b'],"total":%d}' % total
+
+    return StreamingResponse(
+        _body(),
+        media_type="application/json",
+        headers={"ETag": response.headers["ETag"]},
+    )
 
 
 @router.get("/pareto", response_model=ParetoResponse)
-def pareto(
-    db: Session = Depends(get_db),
+async def pareto(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     type: Optional[str] = Query(None, pattern="^(flat|house)$"),
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
@@ -105,45 +317,45 @@ def pareto(
     bbox: Optional[str] = None,
     include_inactive: bool = False,
 ):
-    q = select(Property)
-    # Filter by active status unless explicitly including inactive
-    if not include_inactive:
-        q = q.where(Property.is_active == True)
-    if type:
-        q = q.where(Property.type == type)
-    if min_price is not None:
-        q = q.where(Property.price_eur >= min_price)
-    if max_price is not None:
-        q = q.where(Property.price_eur <= max_price)
-    if min_rooms is not None:
-        q = q.where(Property.rooms >= min_rooms)
-    if max_rooms is not None:
-        q = q.where(Property.rooms <= max_rooms)
-    if min_area is not None:
-        q = q.where(Property.area_m2 >= min_area)
-    if max_area is not None:
-        q = q.where(Property.area_m2 <= max_area)
-    if min_year is not None:
-        q = q.where(Property.year_built >= min_year)
-    if max_year is not None:
-        q = q.where(Property.year_built <= max_year)
-    if location:
-        q = q.where(Property.address.ilike(f"%{location}%"))
-    if bbox:
-        try:
-            min_lng, min_lat, max_lng, max_lat = map(float, bbox.split(","))
-            q = q.where(
-                Property.lat >= min_lat,
-                Property.lat <= max_lat,
-                Property.lng >= min_lng,
-                Property.lng <= max_lng,
-            )
-        except Exception:
-            pass
-
-    rows = db.execute(q).scalars().all()
-    recs = [(r.id, r.price_eur, r.price_per_m2, r.rooms, r.year_built) for r in rows]
-    ids = set(skyline(recs))
+    if _not_modified(request, response):
+        # Returning a Response directly bypasses the injected `response`, so
+        # the validator must be echoed here explicitly (RFC 7232 §4.1)
+        return Response(status_code=304, headers={"ETag": response.headers["ETag"]})
+    filters = dict(
+        type=type,
+        min_price=min_price,
+        max_price=max_price,
+        min_rooms=min_rooms,
+        max_rooms=max_rooms,
+        min_area=min_area,
+        max_area=max_area,
+        min_year=min_year,
+        max_year=max_year,
+        location=location,
+        bbox=bbox,
+        include_inactive=include_inactive,
+    )
+    # Only five scalar columns are needed for the response, so skip ORM
+    # hydration entirely and work with Core row tuples.
+    cols = select(
+        Property.id,
+        Property.price_eur,
+        Property.price_per_m2,
+        Property.rooms,
+        Property.year_built,
+    )
+    cache_key = (get_version(), tuple(sorted(filters.items())))
+    cached_ids = _pareto_cache_get(cache_key)
+    if cached_ids is not None:
+        # Identical request against unchanged data: skip the dominance
+        # anti-join and fetch the known survivors directly.
+        rows = (await db.execute(cols.where(Property.id.in_(cached_ids)))).all()
+    else:
+        q = cols.where(*_filter_conds(Property, **filters)).where(
+            _not_dominated(**filters)
+        )
+        rows = (await db.execute(q)).all()
+        _pareto_cache_put(cache_key, tuple(r.id for r in rows))
     out = [
         ParetoItem(
             id=r.id,
@@ -153,30 +365,32 @@ def pareto(
             year_built=r.year_built,
         )
         for r in rows
-        if r.id in ids
     ]
     return ParetoResponse(items=out)
 
 
 @router.get("/geocode")
-def geocode_location(
+async def geocode_location(
+    request: Request,
+    response: Response,
     query: str = Query(..., description="Location string to geocode"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Geocode a location string to coordinates."""
-    coords = geocode_with_cache(db, query)
+    if _not_modified(request, response):
+        # Returning a Response directly bypasses the injected `response`, so
+        # the validator must be echoed here explicitly (RFC 7232 §4.1)
+        return Response(status_code=304, headers={"ETag": response.headers["ETag"]})
+    coords = await geocode_with_cache(db, query)
     if not coords:
         raise HTTPException(status_code=404, detail="Location not found")
-    db.commit()  # Commit any cache entries
+    await db.commit()  # Commit any cache entries
     return {"lat": coords[0], "lng": coords[1]}
 
 
 @router.get("/{property_id}", response_model=PropertyOut)
-def get_property(property_id: int, db: Session = Depends(get_db)):
-    prop = db.query(Property).filter(Property.id == property_id).first()
+async def get_property(property_id: int, db: AsyncSession = Depends(get_db)):
+    prop = (await db.execute(select(Property).where(Property.id == property_id))).scalars().first()
     if not prop:
         raise HTTPException(status_code=404, detail="Property not found")
     return PropertyOut.model_validate(prop)
-
-
-
@@ -1,5 +1,5 @@
 from uuid import UUID
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field
 from typing import Optional, List
 
 
@@ -18,18 +18,14 @@ class PropertyCreate(BaseModel):
     lat: Optional[float] = Field(default=None, ge=-90, le=90)
     lng: Optional[float] = Field(default=None, ge=-180, le=180)
 
-    @model_validator(mode='after')
-    def calculate_price_per_m2(self):
-        """Calculate price_per_m2 if not provided but price and area are available."""
-        if (self.price_per_m2 is None or self.price_per_m2 == 0) and self.area_m2 and self.area_m2 > 0:
-            self.price_per_m2 = self.price_eur / self.area_m2
-        elif self.price_per_m2 is None:
-            self.price_per_m2 = 0.0
-        return self
-
     def model_dump_for_db(self) -> dict:
-        """Return a dict with all fields set (no None values for required fields)."""
+        """Return a dict with all fields set (no None values for required fields).
+
+        price_per_m2 is excluded: the column is GENERATED ALWAYS in Postgres
+        and computed from price_eur/area_m2 at write time.
+        """
         data = self.model_dump(exclude_none=False)
+        data.pop('price_per_m2', None)
         # Ensure required fields have defaults (handle None explicitly)
         if data.get('price_eur') is None:
             data['price_eur'] = 0.0
@@ -37,8 +33,6 @@ class PropertyCreate(BaseModel):
             data['area_m2'] = 0.0
         if data.get('rooms') is None:
             data['rooms'] = 0
-        if data.get('price_per_m2') is None:
-            data['price_per_m2'] = 0.0
         # Generate URL if missing
         if not data.get('url'):
             data['url'] = f"https://www.nehnutelnosti.sk/detail/{data['external_id']}"
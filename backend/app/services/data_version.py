@@ -0,0 +1,22 @@
+"""Process-local version counter for the properties dataset.
+
+The scraper bumps the version after each committed run; idempotent GET
+endpoints fold it into weak ETags so repeat requests for unchanged data can
+short-circuit with 304 Not Modified instead of re-running queries.
+"""
+
+import time
+
+# Seeded with the process start time so ETags minted before a restart never
+# collide with post-restart ones — a plain 0 seed would hand clients holding
+# old version-0 ETags false 304s until the first scrape bumped the counter.
+_version = time.time_ns()
+
+
+def get_version() -> int:
+    return _version
+
+
+def bump_version() -> None:
+    global _version
+    _version += 1
@@ -1,40 +1,142 @@
-from typing import Optional, Tuple
-from sqlalchemy.orm import Session
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from geopy.geocoders import Nominatim
 from ..models import GeocodeCache
 
 
 _geocoder = Nominatim(user_agent="OptiHome/0.1")
 
+_NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+_GEOCODE_CONCURRENCY = int(os.getenv("GEOCODE_CONCURRENCY", "5"))
 
-def geocode_with_cache(db: Session, query: str) -> Optional[Tuple[float, float]]:
-    # Check cache first
-    cached = db.query(GeocodeCache).filter(GeocodeCache.query == query).first()
-    if cached:
-        return (cached.lat, cached.lng)
-    
-    # Try to geocode
+# Process-local LRU in front of the DB cache: addresses repeat heavily within
+# and across scrape runs, so most lookups never need a round trip at all
+_ADDR_CACHE: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+_ADDR_CACHE_MAX = 10_000
+
+
+def _addr_cache_get(query: str) -> Optional[Tuple[float, float]]:
+    coords = _ADDR_CACHE.get(query)
+    if coords is not None:
+        _ADDR_CACHE.move_to_end(query)
+    return coords
+
+
+def _addr_cache_put(query: str, coords: Tuple[float, float]) -> None:
+    _ADDR_CACHE[query] = coords
+    _ADDR_CACHE.move_to_end(query)
+    if len(_ADDR_CACHE) > _ADDR_CACHE_MAX:
+        _ADDR_CACHE.popitem(last=False)
+
+
+async def geocode_many(db: AsyncSession, queries: Iterable[str]) -> Dict[str, Tuple[float, float]]:
+    """Resolve many location strings in one batch.
+
+    Cached rows are loaded with a single IN-query; misses are geocoded
+    concurrently against Nominatim (bounded by a semaphore to stay polite) and
+    written back with one ON CONFLICT DO NOTHING insert. The caller is
+    responsible for committing.
+    """
+    queries = list(dict.fromkeys(q for q in queries if q))
+    if not queries:
+        return {}
+
+    results: Dict[str, Tuple[float, float]] = {}
+    for query in queries:
+        coords = _addr_cache_get(query)
+        if coords is not None:
+            results[query] = coords
+
+    uncached = [q for q in queries if q not in results]
+    if uncached:
+        rows = await db.execute(
+            select(GeocodeCache.query, GeocodeCache.lat, GeocodeCache.lng).where(
+                GeocodeCache.query.in_(uncached)
+            )
+        )
+        for query, lat, lng in rows:
+            results[query] = (lat, lng)
+            _addr_cache_put(query, (lat, lng))
+
+    missing = [q for q in queries if q not in results]
+    if not missing:
+        return results
+
+    sem = asyncio.Semaphore(_GEOCODE_CONCURRENCY)
+
+    async with httpx.AsyncClient(
+        headers={"User-Agent": "OptiHome/0.1"}, timeout=10.0
+    ) as client:
+        async def _lookup(query: str):
+            async with sem:
+                try:
+                    resp = await client.get(
+                        _NOMINATIM_URL,
+                        params={"q": query, "format": "jsonv2", "limit": 1},
+                    )
+                    resp.raise_for_status()
+                    data = resp.json()
+                except Exception:
+                    return query, None
+                if not data:
+                    return query, None
+                return query, (float(data[0]["lat"]), float(data[0]["lon"]))
+
+        pairs = await asyncio.gather(*(_lookup(q) for q in missing))
+
+    new_rows = [
+        {"query": query, "lat": coords[0], "lng": coords[1]}
+        for query, coords in pairs
+        if coords
+    ]
+    for row in new_rows:
+        results[row["query"]] = (row["lat"], row["lng"])
+        _addr_cache_put(row["query"], (row["lat"], row["lng"]))
+    if new_rows:
+        await db.execute(
+            insert(GeocodeCache)
+            .values(new_rows)
+            .on_conflict_do_nothing(index_elements=["query"])
+        )
+    return results
+
+
+async def geocode_with_cache(db: AsyncSession, query: str) -> Optional[Tuple[float, float]]:
+    coords = _addr_cache_get(query)
+    if coords is not None:
+        return coords
+
+    # Check the DB cache next; selecting just (lat, lng) keeps the statement
+    # in the compiled-query cache and skips ORM hydration
+    row = (
+        await db.execute(
+            select(GeocodeCache.lat, GeocodeCache.lng).where(GeocodeCache.query == query)
+        )
+    ).first()
+    if row:
+        _addr_cache_put(query, (row.lat, row.lng))
+        return (row.lat, row.lng)
+
+    # Try to geocode; geopy is synchronous, so run it off the event loop
     try:
-        loc = _geocoder.geocode(query, addressdetails=False, timeout=10)
-        if loc:
-            # Check again in case it was added by another process
-            cached = db.query(GeocodeCache).filter(GeocodeCache.query == query).first()
-            if cached:
-                return (cached.lat, cached.lng)
-            
-            # Add to cache (UUID will be auto-generated)
-            try:
-                rec = GeocodeCache(query=query, lat=loc.latitude, lng=loc.longitude)
-                db.add(rec)
-                # Don't commit here - let caller handle commits
-            except Exception:
-                # If duplicate key error, just return the coordinates without caching
-                # This can happen in concurrent scenarios
-                pass
-            return (loc.latitude, loc.longitude)
+        loc = await asyncio.to_thread(_geocoder.geocode, query, addressdetails=False, timeout=10)
     except Exception:
         return None
-    return None
-
-
+    if not loc:
+        return None
 
+    # ON CONFLICT DO NOTHING replaces the old re-check/race handling; caller
+    # still handles the commit
+    await db.execute(
+        insert(GeocodeCache)
+        .values(query=query, lat=loc.latitude, lng=loc.longitude)
+        .on_conflict_do_nothing(index_elements=["query"])
+    )
+    _addr_cache_put(query, (loc.latitude, loc.longitude))
+    return (loc.latitude, loc.longitude)
@@ -1,5 +1,7 @@
 from typing import Iterable, List, Optional, Tuple
 
+import numpy as np
+
 
 def is_dominated(a: Tuple[float, float, int, Optional[int]], b: Tuple[float, float, int, Optional[int]]) -> bool:
     # Objectives: minimize price, minimize price_per_m2, maximize rooms, maximize year_built
@@ -23,22 +25,35 @@ def is_dominated(a: Tuple[float, float, int, Optional[int]], b: Tuple[float, flo
 
 def skyline(records: Iterable[Tuple[int, float, float, int, Optional[int]]]) -> List[int]:
     # records: (id, price, price_per_m2, rooms, year)
+    # Vectorized presort-and-prune sweep: maximize objectives are negated so
+    # everything is "minimize", rows are sorted lexicographically so a row can
+    # only be dominated by rows that precede it, then each candidate is checked
+    # against the running Pareto front in one NumPy comparison instead of the
+    # old per-record Python tuple loop.
     items = list(records)
-    pareto: List[Tuple[int, float, float, int, Optional[int]]] = []
-    for rec in items:
-        dominated = False
-        to_remove: List[int] = []
-        for i, p in enumerate(pareto):
-            if is_dominated((rec[1], rec[2], rec[3], rec[4]), (p[1], p[2], p[3], p[4])):
-                dominated = True
-                break
-            if is_dominated((p[1], p[2], p[3], p[4]), (rec[1], rec[2], rec[3], rec[4])):
-                to_remove.append(i)
-        if not dominated:
-            for idx in reversed(to_remove):
-                pareto.pop(idx)
-            pareto.append(rec)
-    return [r[0] for r in pareto]
-
+    if not items:
+        return []
 
+    ids = np.array([r[0] for r in items], dtype=np.int64)
+    arr = np.array(
+        [(r[1], r[2], -r[3], -(r[4] if r[4] is not None else -1)) for r in items],
+        dtype=np.float64,
+    )
 
+    order = np.lexsort((arr[:, 3], arr[:, 2], arr[:, 1], arr[:, 0]))
+    arr = arr[order]
+    ids = ids[order]
+
+    front = np.empty_like(arr)
+    k = 0
+    keep: List[int] = []
+    for i in range(arr.shape[0]):
+        row = arr[i]
+        if k:
+            f = front[:k]
+            if np.any(np.all(f <= row, axis=1) & np.any(f < row, axis=1)):
+                continue
+        front[k] = row
+        k += 1
+        keep.append(i)
+    return ids[keep].tolist()
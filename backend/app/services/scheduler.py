@@ -1,6 +1,4 @@
 import os
-import asyncio
-from sqlalchemy.orm import Session
 
 from ..db import SessionLocal
 from ..services.scraper.runner import run_scrape
@@ -15,25 +13,31 @@ except ImportError:
     CronTrigger = None
 
 
-scheduler = AsyncIOScheduler() if APSCHEDULER_AVAILABLE else None
+# One scrape at a time: overlapping or piled-up runs would hammer the target
+# site and the DB for no fresher data. Missed runs within an hour collapse
+# into a single catch-up run.
+_JOB_DEFAULTS = {"coalesce": True, "max_instances": 1, "misfire_grace_time": 3600}
+
+scheduler = AsyncIOScheduler(job_defaults=_JOB_DEFAULTS) if APSCHEDULER_AVAILABLE else None
 _scheduler_enabled = False  # Runtime flag to track if scheduler is enabled
 
 
-async def scheduled_scrape_job():
-    """Scheduled job to scrape properties."""
-    db: Session = SessionLocal()
+async def _scrape_kind(kind: str, pages: int):
     try:
-        # Scrape flats and houses
-        for kind in ["flat", "house"]:
-            pages = int(os.getenv("SCRAPE_PAGES_PER_RUN", "5"))
-            try:
-                await run_scrape(db, kind=kind, pages=pages)
-            except Exception as e:
-                print(f"Error scraping {kind}: {e}")
+        async with SessionLocal() as db:
+            await run_scrape(db, kind=kind, pages=pages)
     except Exception as e:
-        print(f"Error in scheduled scrape: {e}")
-    finally:
-        db.close()
+        print(f"Error scraping {kind}: {e}")
+
+
+async def scheduled_scrape_job():
+    """Scheduled job to scrape properties."""
+    pages = int(os.getenv("SCRAPE_PAGES_PER_RUN", "5"))
+    # Run the kinds one after the other: the shared scraping_state is
+    # single-writer (see scraping_status.py) and two concurrent run_scrape
+    # calls would interleave its progress fields and status transitions.
+    for kind in ("flat", "house"):
+        await _scrape_kind(kind, pages)
 
 
 def start_scheduler():
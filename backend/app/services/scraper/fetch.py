@@ -1,23 +1,61 @@
-import time
+import asyncio
 from typing import Optional
 import random
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
+
+
+def _is_transient(exc: BaseException) -> bool:
+    # Retry server-side hiccups and connection/timeout errors; a 4xx is a
+    # real answer and retrying it just burns the crawl budget
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
 
 
 HEADERS = {
     "User-Agent": "OptiHomeBot/0.1 (research; contact: example@example.com)",
 }
 
+# Shared client so fetches reuse pooled (and HTTP/2-multiplexed) connections
+# instead of paying DNS + TCP + TLS per request
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            http2=True,
+            timeout=httpx.Timeout(15.0, connect=10.0),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+        )
+    return _client
+
+
+async def aclose_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=8))
-async def fetch(url: str, timeout: float = 15.0, follow_redirects: bool = True) -> Optional[str]:
-    async with httpx.AsyncClient(headers=HEADERS, timeout=timeout, follow_redirects=follow_redirects) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        # polite crawl
-        time.sleep(0.5 + random.random())
-        return resp.text
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=8),
+    retry=retry_if_exception(_is_transient),
+    # Exhausted retries yield None instead of raising, so a flaky page costs
+    # one listing batch at most, not the whole run
+    retry_error_callback=lambda retry_state: None,
+)
+async def fetch(url: str) -> Optional[str]:
+    resp = await _get_client().get(url)
+    resp.raise_for_status()
+    # polite crawl; non-blocking so other fetches can interleave
+    await asyncio.sleep(0.5 + random.random())
+    return resp.text
 
 
 
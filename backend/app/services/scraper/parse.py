@@ -1,82 +1,103 @@
-from bs4 import BeautifulSoup
+import hashlib
+import re
+
+import lxml.html
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml.etree import XPath
 from typing import List, Dict, Optional
 
 
-def parse_listings(html: str) -> List[Dict]:
-    soup = BeautifulSoup(html, "html.parser")
+_DETAIL_CLASS_RE = re.compile(r"property-attributes|facts|property-title")
+
+
+def _detail_tag_match(name: str, attrs: dict) -> bool:
+    if name in ("h1", "title"):
+        return True
+    cls = attrs.get("class") or ""
+    if isinstance(cls, (list, tuple)):
+        cls = " ".join(cls)
+    return bool(_DETAIL_CLASS_RE.search(cls)) or attrs.get("data-testid") == "property-title"
+
+
+# Detail pages are only mined for the year/title elements; straining the soup
+# to those subtrees skips tree construction for the rest of the document
+_DETAIL_STRAINER = SoupStrainer(_detail_tag_match)
+
+
+# Compiled once; the helpers below run several times per listing, so per-call
+# re.search with a string pattern would pay the re-module cache probe each time
+_NUM_RE = re.compile(r"[0-9]+(?:[\s\xa0\,\.][0-9]+)*")
+_INZERAT = re.compile(r"/inzerat/(\d+)/?")
+_DETAIL = re.compile(r"/detail/([A-Za-z0-9_-]+)/?")
+_TAIL_NUM = re.compile(r"/(\d+)/?$")
+_ROOMS = re.compile(r"(\d+)[\s-]*(?:izbový|izby|izb|izba)", re.IGNORECASE)
+
+# Translation table so separator stripping is one O(n) scan instead of a
+# chain of str.replace passes
+_STRIP_ALL_SEPS = str.maketrans({" ": None, "\xa0": None, ",": None, ".": None})
+
+
+def _has_class(name: str) -> str:
+    # XPath equivalent of a CSS class selector
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Compiled once at import; each listing card is then read with one XPath
+# evaluation per field instead of re-parsed CSS selectors. The mui-* hash
+# class is the discriminating one per field.
+_CARDS = XPath(
+    "//div[%s]"
+    % " and ".join(
+        _has_class(c)
+        for c in ("MuiGrid2-root", "MuiGrid2-container", "MuiGrid2-direction-xs-row", "mui-1qrjc3g")
+    )
+)
+_URL = XPath("(.//a[@href])[1]/@href")
+_TITLE = XPath("string((.//h2 | .//a[@href]//h3)[1])")
+_LOCATION = XPath("string((.//p[%s])[1])" % _has_class("mui-1jfsjra"))
+_AREA = XPath("string((.//p[%s])[1])" % _has_class("mui-5c21y4"))
+_PRICE = XPath("string((.//p[%s])[1])" % _has_class("mui-ce5ndv"))
+_PRICE_PER_M2 = XPath("string((.//p[%s])[1])" % _has_class("mui-u7akpj"))
+_DESCRIPTION = XPath("string((.//p[%s])[1])" % _has_class("mui-ce8onx"))
+_SELLER = XPath("string((.//p[%s])[1])" % _has_class("mui-srzmk6"))
+_ROOMS_EL = XPath("string((.//p[%s])[1])" % _has_class("mui-1u9yyor"))
+
+
+def parse_listings(html) -> List[Dict]:
+    """Parse listing cards from an HTML string or a pre-parsed lxml tree."""
+    tree = lxml.html.fromstring(html) if isinstance(html, (str, bytes)) else html
     items: List[Dict] = []
-    # Container for each listing
-    listing_containers = soup.select("div.MuiGrid2-root.MuiGrid2-container.MuiGrid2-direction-xs-row.mui-1qrjc3g")
-    
-    for container in listing_containers:
+
+    for container in _CARDS(tree):
         # Find the link to detail page (usually in an <a> tag)
-        url_el = container.select_one("a")
-        if not url_el or not url_el.get("href"):
+        hrefs = _URL(container)
+        if not hrefs:
             continue
-        
-        url = url_el["href"]
+
+        url = hrefs[0]
         # Make URL absolute if relative
         if url.startswith("/"):
             url = f"https://www.nehnutelnosti.sk{url}"
-        
+
         # Extract external_id from URL (usually in format like /inzerat/123456/)
         external_id = _extract_id_from_url(url)
         if not external_id:
             continue
-        
-        # Title - try multiple selectors as HTML structure may vary
-        title = ""
-        title_selectors = [
-            "h2.MuiTypography-root.MuiTypography-h4.MuiTypography-noWrap.mui-ibivuk",
-            "h2.MuiTypography-h4",
-            "h2.MuiTypography-root",
-            "h2",
-            "a[href] h2",
-            "a[href] h3",
-        ]
-        for selector in title_selectors:
-            title_el = container.select_one(selector)
-            if title_el and title_el.text.strip():
-                title = title_el.text.strip()
-                break
-        
-        # Location
-        location_el = container.select_one("p.MuiTypography-root.MuiTypography-body2.MuiTypography-noWrap.mui-1jfsjra")
-        location = location_el.text.strip() if location_el else ""
-        
-        # Area in m²
-        area_el = container.select_one("p.MuiTypography-root.MuiTypography-body2.mui-5c21y4")
-        area_text = area_el.text.strip() if area_el else ""
-        area = _extract_number(area_text)
-        
-        # Price
-        price_el = container.select_one("p.MuiTypography-root.MuiTypography-h5.mui-ce5ndv")
-        price_text = price_el.text.strip() if price_el else ""
-        price = None
-        if price_el and any(c.isdigit() for c in price_text):
-            price = _extract_number(price_text)
-        
-        # Price per m²
-        price_per_m2_el = container.select_one("p.MuiTypography-root.MuiTypography-label1.mui-u7akpj")
-        price_per_m2_text = price_per_m2_el.text.strip() if price_per_m2_el else ""
-        price_per_m2 = _extract_number(price_per_m2_text) if price_per_m2_el else None
-        
-        # Description
-        desc_el = container.select_one("p.MuiTypography-root.MuiTypography-body2.mui-ce8onx")
-        description = desc_el.text.strip() if desc_el else ""
-        
-        # Seller
-        seller_el = container.select_one("p.MuiTypography-root.MuiTypography-label1.MuiTypography-noWrap.mui-srzmk6")
-        seller = seller_el.text.strip() if seller_el else ""
-        
-        # Rooms from dedicated element
-        rooms_el = container.select_one("p.MuiTypography-root.MuiTypography-body2.MuiTypography-noWrap.mui-1u9yyor")
-        rooms_text = rooms_el.text.strip() if rooms_el else ""
-        rooms = None
-        if rooms_el:
-            # Extract number from text like "3 izbový byt" or "4 izby"
-            rooms = _extract_rooms_from_text(rooms_text)
-        
+
+        title = _TITLE(container).strip()
+        location = _LOCATION(container).strip()
+        area = _extract_number(_AREA(container).strip())
+
+        # _extract_number already returns None when there's no digit to find
+        price = _extract_number(_PRICE(container).strip())
+
+        price_per_m2 = _extract_number(_PRICE_PER_M2(container).strip())
+        description = _DESCRIPTION(container).strip()
+        seller = _SELLER(container).strip()
+
+        # Extract number from text like "3 izbový byt" or "4 izby"
+        rooms = _extract_rooms_from_text(_ROOMS_EL(container).strip())
+
         items.append(
             {
                 "external_id": str(external_id),
@@ -94,99 +115,85 @@ def parse_listings(html: str) -> List[Dict]:
     return items
 
 
+def parse_detail(html: str) -> tuple[Optional[int], Optional[str]]:
+    """Extract (year_built, title) from detail page HTML with one soup."""
+    soup = BeautifulSoup(html, "lxml", parse_only=_DETAIL_STRAINER)
+    return _year_from_soup(soup), _title_from_soup(soup)
+
+
 def parse_detail_for_year(html: str) -> Optional[int]:
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, "lxml", parse_only=_DETAIL_STRAINER)
+    return _year_from_soup(soup)
+
+
+def parse_detail_for_title(html: str) -> Optional[str]:
+    """Extract title from detail page HTML."""
+    soup = BeautifulSoup(html, "lxml", parse_only=_DETAIL_STRAINER)
+    return _title_from_soup(soup)
+
+
+def _year_from_soup(soup: BeautifulSoup) -> Optional[int]:
     # Placeholder logic; refine with real selectors
     for row in soup.select(".property-attributes li, .facts li"):
         text = row.get_text(" ", strip=True)
-        if "rok" in text.lower() and any(ch.isdigit() for ch in text):
+        if "rok" in text.lower():
             num = _extract_number(text)
             if num and 1800 < num < 2100:
                 return int(num)
     return None
 
 
-def parse_detail_for_title(html: str) -> Optional[str]:
-    """Extract title from detail page HTML."""
-    soup = BeautifulSoup(html, "html.parser")
-    
-    # Try multiple selectors for title on detail page
-    title_selectors = [
-        "h1",
-        "h1.MuiTypography-root",
-        "h1.MuiTypography-h3",
-        "h1.MuiTypography-h4",
-        ".property-title",
-        "[data-testid='property-title']",
-        "title",  # Fallback to page title tag
-    ]
-    
-    for selector in title_selectors:
-        title_el = soup.select_one(selector)
-        if title_el and title_el.text.strip():
-            title = title_el.text.strip()
-            # If it's the page title tag, might have extra text like " | nehnutelnosti.sk"
-            if selector == "title":
-                title = title.split("|")[0].strip()
-            if title:
-                return title
-    
+def _title_from_soup(soup: BeautifulSoup) -> Optional[str]:
+    # One combined OR-selector walks the tree once instead of per candidate;
+    # the <title> tag stays a separate fallback so it can't win on document
+    # order over a real heading
+    title_el = soup.select_one("h1, .property-title, [data-testid='property-title']")
+    if title_el and title_el.text.strip():
+        return title_el.text.strip()
+
+    title_el = soup.select_one("title")
+    if title_el and title_el.text.strip():
+        # Page title might have extra text like " | nehnutelnosti.sk"; slice
+        # at the first '|' instead of materializing every split fragment
+        title = title_el.text
+        idx = title.find("|")
+        if idx >= 0:
+            title = title[:idx]
+        title = title.strip()
+        if title:
+            return title
+
     return None
 
 
 def _extract_number(text: str) -> Optional[float]:
-    import re
-
     if not text:
         return None
-    
+
     # Match sequences of digits with separators (spaces, commas, dots, non-breaking spaces)
     # Use a simple, flexible pattern that matches the entire number
     # This will match: digits followed by any combination of separators and more digits
-    pattern = r"[0-9]+(?:[\s\xa0\,\.][0-9]+)*"
-    match = re.search(pattern, text)
+    match = _NUM_RE.search(text)
     if not match:
         return None
     
     s = match.group(0)
-    
-    # Detect format: European (comma as decimal) vs American (dot as decimal)
-    # European: "1 473 734,96" or "1473734,96" - comma followed by 1-2 digits at end (typically 2 for cents)
-    # American: "1,473,734.96" or "1473734.96" - dot followed by 1-2 digits at end
-    
-    # Check if comma is decimal separator:
-    # - In European format with spaces: comma after space/digits followed by 1-2 digits at end
-    # - Without spaces: comma followed by 1-2 digits at end (not 3, as that would be thousands)
-    has_spaces = ' ' in s or '\xa0' in s
-    comma_match = re.search(r',(\d{1,2})$', s)  # 1-2 digits (not 3, as 3 would be thousands)
-    # Check if dot is decimal separator (followed by 1-2 digits at the end)
-    dot_match = re.search(r'\.(\d{1,2})$', s)
-    
-    # Comma is decimal if:
-    # 1. It's followed by 1-2 digits at end AND (there are spaces in the number OR no other commas before it)
-    # 2. This distinguishes "1 473 734,96" (decimal) from "1,234,567" (thousands)
-    has_comma_decimal = comma_match is not None and (has_spaces or s.count(',') == 1)
-    has_dot_decimal = dot_match is not None
-    
-    if has_comma_decimal and not has_dot_decimal:
-        # European format: spaces are thousands, comma is decimal
-        # Remove all spaces (thousands separators)
-        s = s.replace("\xa0", "").replace(" ", "")
-        # Replace comma with dot for decimal separator
-        s = s.replace(",", ".")
-    elif has_dot_decimal:
-        # American format: dots or commas can be thousands, dot is decimal
-        # Remove spaces and commas (thousands separators)
-        s = s.replace("\xa0", "").replace(" ", "").replace(",", "")
-        # If multiple dots, keep only the last one as decimal
-        if s.count(".") > 1:
-            parts = s.split(".")
-            s = "".join(parts[:-1]) + "." + parts[-1]
+
+    # The rightmost ',' or '.' is the decimal point iff it is followed by 1-2
+    # digits (3 would be a thousands group); everything before it is thousands
+    # separators. This handles both "1 473 734,96" (European) and
+    # "1,473,734.96" (American) in a single scan. A trailing comma group is
+    # only treated as decimal when spaces group the thousands or it is the
+    # sole comma — "1,234,567" stays thousands.
+    last = max(s.rfind(","), s.rfind("."))
+    if last != -1 and 1 <= len(s) - last - 1 <= 2 and (
+        s[last] == "." or " " in s or "\xa0" in s or s.count(",") == 1
+    ):
+        s = s[:last].translate(_STRIP_ALL_SEPS) + "." + s[last + 1:]
     else:
         # No decimal part detected - all separators are thousands separators
-        # Remove all separators (spaces, commas, dots)
-        s = s.replace("\xa0", "").replace(" ", "").replace(",", "").replace(".", "")
-    
+        s = s.translate(_STRIP_ALL_SEPS)
+
     try:
         return float(s)
     except ValueError:
@@ -195,16 +202,13 @@ def _extract_number(text: str) -> Optional[float]:
 
 def _extract_id_from_url(url: str) -> Optional[str]:
     """Extract property ID from URL like /inzerat/123456/ or /detail/JuT21KC6jyn/..."""
-    import re
-    import hashlib
-    
     # Try to find numeric ID in URL (pattern: /inzerat/123456/)
-    match = re.search(r"/inzerat/(\d+)/?", url)
+    match = _INZERAT.search(url)
     if match:
         return match.group(1)
-    
+
     # Try to find alphanumeric ID in URL (pattern: /detail/JuT21KC6jyn/...)
-    match = re.search(r"/detail/([A-Za-z0-9_-]+)/?", url)
+    match = _DETAIL.search(url)
     if match:
         id_str = match.group(1)
         # Ensure it's not too long (max 100 chars)
@@ -214,7 +218,7 @@ def _extract_id_from_url(url: str) -> Optional[str]:
         return id_str[:100]
     
     # Fallback: use URL hash or last numeric segment
-    match = re.search(r"/(\d+)/?$", url)
+    match = _TAIL_NUM.search(url)
     if match:
         return match.group(1)
     
@@ -225,14 +229,13 @@ def _extract_id_from_url(url: str) -> Optional[str]:
 
 def _extract_rooms_from_text(text: str) -> Optional[int]:
     """Extract number of rooms from text (e.g., '3 izbový byt' -> 3, 'garzónka' -> 0)."""
-    import re
     if not text:
         return None
     # Handle garzónka (studio apartment) - typically 0 or 1 room
     if "garzónka" in text.lower():
         return 0
     # Match patterns like "3 izbový", "4-izbový", "2 izby", "1 izba"
-    match = re.search(r"(\d+)[\s-]*(?:izbový|izby|izb|izba)", text, re.IGNORECASE)
+    match = _ROOMS.search(text)
     if match:
         try:
             return int(match.group(1))
@@ -1,18 +1,61 @@
-from sqlalchemy.orm import Session
+import asyncio
+import os
+from uuid import uuid4
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Iterable
-from datetime import datetime
+from datetime import datetime, timezone
 from .fetch import fetch
-from .parse import parse_listings, parse_detail_for_year, parse_detail_for_title
+from .parse import parse_listings, parse_detail
+from ...crud import bulk_upsert_properties
 from ...models import Property
-from ...services.geocode import geocode_with_cache
+from ...services.geocode import geocode_many
 from ...services.scraping_status import scraping_state, ScrapingStatus
+from ...services.data_version import bump_version
 from ...schemas import PropertyCreate
 
 
 BASE_URL = "https://www.nehnutelnosti.sk/"
 
+# Detail pages are pure network I/O, so fan them out; the semaphore keeps us
+# polite to the target site
+_SEM = asyncio.Semaphore(int(os.getenv("SCRAPE_CONCURRENCY", "8")))
+
+# parse.py already normalizes numerics, so full Pydantic validation per row is
+# mostly redundant; set to "0" to force it anyway
+_FAST_VALIDATE = os.getenv("SCRAPE_FAST_VALIDATE", "1") == "1"
+
+# Commit cadence: every commit fsyncs WAL, so batch a few pages per
+# transaction while keeping crash loss bounded
+_COMMIT_EVERY_PAGES = 5
+
+
+async def _fetch_detail(item: dict):
+    async with _SEM:
+        try:
+            html = await fetch(item["url"])
+        except Exception as e:
+            return item, e
+    if not html:
+        return item, None
+    # Parse in the worker thread pool too, so detail CPU work overlaps the
+    # other in-flight fetches instead of blocking the loop; parse_detail
+    # builds one soup for both fields
+    return item, await asyncio.to_thread(parse_detail, html)
+
+
+async def _fetch_page(url: str):
+    async with _SEM:
+        try:
+            return await fetch(url)
+        except Exception:
+            return None
+
 
-async def run_scrape(db: Session, kind: str = "flat", pages: int = 1) -> int:
+async def run_scrape(
+    db: AsyncSession, kind: str = "flat", pages: int = 1, force_refresh: bool = False
+) -> int:
     # kind: flat | house
     async with scraping_state.lock:
         scraping_state.status = ScrapingStatus.RUNNING
@@ -27,72 +70,148 @@ async def run_scrape(db: Session, kind: str = "flat", pages: int = 1) -> int:
         scraping_state.add_log("info", f"Starting scrape: {kind}, {pages} page(s)")
     
     count = 0
-    seen_external_ids = set()  # Track which properties we've seen in this scrape
-    
+    # Rows upserted in this run get stamped with this; the soft-delete below
+    # then deactivates everything of this kind with an older (or no) stamp
+    scrape_start = datetime.now(timezone.utc)
+
+
     try:
-        for page in range(1, pages + 1):
-            async with scraping_state.lock:
-                scraping_state.current_page = page
-                scraping_state.add_log("info", f"Processing page {page}/{pages} for {kind}")
-            
-            list_url = _build_list_url(kind, page)
-            html = await fetch(list_url)
+        # Build all page URLs up front and fetch them concurrently (bounded by
+        # the shared semaphore); processing below then never waits on a list
+        # page
+        list_urls = [_build_list_url(kind, p) for p in range(1, pages + 1)]
+        htmls = await asyncio.gather(*(_fetch_page(u) for u in list_urls))
+
+        for page, html in enumerate(htmls, start=1):
+            scraping_state.current_page = page
+            scraping_state.add_log("info", f"Processing page {page}/{pages} for {kind}")
+
             if not html:
-                async with scraping_state.lock:
-                    scraping_state.add_log("warning", f"Failed to fetch page {page}")
+                scraping_state.add_log("warning", f"Failed to fetch page {page}")
                 continue
 
-            items = parse_listings(html)
-            async with scraping_state.lock:
-                scraping_state.items_total = len(items)
-                scraping_state.add_log("info", f"Found {len(items)} items on page {page}")
-            
+            # CPU-bound tree build; run off the loop so detail fetches and the
+            # scheduler keep ticking during the parse
+            items = await asyncio.to_thread(parse_listings, html)
+            scraping_state.items_total = len(items)
+            scraping_state.add_log("info", f"Found {len(items)} items on page {page}")
+
+            # Batch-geocode the page's addresses in one pass instead of a
+            # per-item lookup inside the upsert
+            addresses = [
+                it["location"]
+                for it in items
+                if it.get("location") and (it.get("lat") is None or it.get("lng") is None)
+            ]
+            coords_by_addr = await geocode_many(db, addresses)
+            for it in items:
+                coords = coords_by_addr.get(it.get("location"))
+                if coords and it.get("lat") is None:
+                    it["lat"], it["lng"] = coords
+
+            # Skip items without external_id (required)
+            items = [it for it in items if it.get("external_id")]
+
+            # One IN-query for what we already know about this page's rows,
+            # so the bulk upsert doesn't clobber stored titles/years when the
+            # listing card lacks them
+            existing: dict[str, tuple] = {}
+            if items:
+                result = await db.execute(
+                    select(Property.external_id, Property.title, Property.year_built).where(
+                        Property.external_id.in_([it["external_id"] for it in items])
+                    )
+                )
+                existing = {ext: (title, year) for ext, title, year in result}
+
+            # Fetch all detail pages for the page concurrently, then parse and
+            # upsert sequentially. Rows whose year and title are already
+            # stored don't need the detail page at all — on steady-state
+            # reruns that skips most of the HTTP traffic.
+            def _needs_detail(it: dict) -> bool:
+                if not it.get("url"):
+                    return False
+                if force_refresh:
+                    return True
+                prev_title, prev_year = existing.get(it["external_id"], (None, None))
+                return not (prev_year and (prev_title or it.get("title", "").strip()))
+
+            detail_by_id: dict[str, tuple] = {}
+            results = await asyncio.gather(
+                *(_fetch_detail(it) for it in items if _needs_detail(it))
+            )
+            for it, detail in results:
+                if isinstance(detail, Exception):
+                    scraping_state.add_log("warning", f"Error fetching detail for {it.get('external_id')}: {str(detail)}")
+                elif detail:
+                    detail_by_id[it["external_id"]] = detail
+
+            rows = []
             for idx, item in enumerate(items):
-                # Skip items without external_id (required)
-                if not item.get("external_id"):
-                    continue
-                # Track that we've seen this property
-                seen_external_ids.add(item["external_id"])
-                # Fetch detail page for year built and title (if missing)
                 year = None
-                title = item.get("title", "").strip()
-                try:
-                    detail_html = await fetch(item["url"]) if item.get("url") else None
-                    if detail_html:
-                        year = parse_detail_for_year(detail_html)
-                        # If title is missing from listing, try to get it from detail page
-                        if not title:
-                            detail_title = parse_detail_for_title(detail_html)
-                            if detail_title:
-                                title = detail_title
-                                item["title"] = title
-                except Exception as e:
-                    async with scraping_state.lock:
-                        scraping_state.add_log("warning", f"Error fetching detail for {item.get('external_id')}: {str(e)}")
-                
-                upsert_property(db, item, kind, year)
+                detail = detail_by_id.get(item["external_id"])
+                if detail:
+                    year, detail_title = detail
+                    # If title is missing from listing, take the detail-page one
+                    if not item.get("title", "").strip() and detail_title:
+                        item["title"] = detail_title
+
+                # Fall back to stored values when this pass produced none
+                prev_title, prev_year = existing.get(item["external_id"], (None, None))
+                if year is None:
+                    year = prev_year
+                if not item.get("title") and prev_title:
+                    item["title"] = prev_title
+
+                rows.append(_build_row(item, kind, year, scrape_start))
                 count += 1
-                async with scraping_state.lock:
-                    scraping_state.items_processed = count
-                    if idx % 10 == 0 or idx == len(items) - 1:  # Log every 10th item or last item
-                        scraping_state.add_log("debug", f"Processed {count} properties so far")
-            db.commit()
-        
-        # Mark properties of this type that weren't seen as inactive (soft-delete)
-        if seen_external_ids:
-            async with scraping_state.lock:
-                scraping_state.add_log("info", f"Marking unseen properties as inactive")
-            db.query(Property).filter(
-                Property.type == kind,
-                Property.external_id.notin_(seen_external_ids)
-            ).update({"is_active": False}, synchronize_session=False)
-            db.commit()
+                scraping_state.items_processed = count
+                # Log every 10th item or last item; check the flag here so the
+                # f-string isn't even built when debug logging is off
+                if scraping_state.debug_enabled and (idx % 10 == 0 or idx == len(items) - 1):
+                    scraping_state.add_log("debug", f"Processed {count} properties so far")
+
+            # One INSERT ... ON CONFLICT DO UPDATE per page instead of a
+            # select/insert round trip per item. Promoted listings can repeat
+            # a card within a page, and duplicate conflict keys in a single
+            # statement raise CardinalityViolation — keep the last occurrence.
+            if rows:
+                rows = list({row["external_id"]: row for row in rows}.values())
+                await bulk_upsert_properties(db, rows)
+            await db.flush()
+            if page % _COMMIT_EVERY_PAGES == 0:
+                await db.commit()
         
+        # Mark properties of this type that weren't seen as inactive
+        # (soft-delete). Constant-size SQL regardless of scrape size: rows
+        # touched this run carry last_seen_at >= scrape_start, so anything
+        # older (or never stamped) wasn't in the listings.
+        if count:
+            scraping_state.add_log("info", f"Marking unseen properties as inactive")
+            await db.execute(
+                update(Property)
+                .where(
+                    Property.type == kind,
+                    or_(
+                        Property.last_seen_at.is_(None),
+                        Property.last_seen_at < scrape_start,
+                    ),
+                )
+                .values(is_active=False)
+                .execution_options(synchronize_session=False)
+            )
+
+        # Single end-of-run commit covers the tail pages and the soft-delete
+        await db.commit()
+
+        # Invalidate ETag-cached GET responses now that data changed
+        bump_version()
+
         async with scraping_state.lock:
             scraping_state.status = ScrapingStatus.COMPLETED
             scraping_state.end_time = datetime.now()
             scraping_state.add_log("info", f"Scrape completed: {count} properties processed")
-        
+
         return count
     except Exception as e:
         async with scraping_state.lock:
@@ -103,13 +222,14 @@ async def run_scrape(db: Session, kind: str = "flat", pages: int = 1) -> int:
         raise
 
 
-def upsert_property(db: Session, item: dict, kind: str, year_built: int | None) -> None:
-    """Upsert property using Pydantic model for data validation."""
-    ext_id = item.get("external_id")
-    if not ext_id:
-        return
-    
-    # Prepare data for Pydantic model
+def _build_row(item: dict, kind: str, year_built: int | None, seen_at: datetime) -> dict:
+    """Build one upsert row, validated through the Pydantic model.
+
+    Rows always carry the same keys so they can be batched into a single
+    multi-row INSERT. The uuid only applies to fresh inserts; on conflict the
+    existing value is kept (see crud._UPSERT_IMMUTABLE).
+    """
+    ext_id = item["external_id"]
     property_data = {
         "external_id": ext_id,
         "url": item.get("url"),
@@ -124,12 +244,19 @@ def upsert_property(db: Session, item: dict, kind: str, year_built: int | None)
         "lat": item.get("lat"),
         "lng": item.get("lng"),
     }
-    
-    # Validate and normalize data using Pydantic
+
+    # Normalize via Pydantic; model_construct skips field validation the
+    # parser already performed, falling back to the validating path on any
+    # surprise
     try:
-        prop_create = PropertyCreate(**property_data)
-        db_data = prop_create.model_dump_for_db()
-    except Exception as e:
+        if _FAST_VALIDATE:
+            try:
+                db_data = PropertyCreate.model_construct(**property_data).model_dump_for_db()
+            except Exception:
+                db_data = PropertyCreate(**property_data).model_dump_for_db()
+        else:
+            db_data = PropertyCreate(**property_data).model_dump_for_db()
+    except Exception:
         # If validation fails, use minimal safe defaults
         db_data = {
             "external_id": ext_id,
@@ -137,58 +264,32 @@ def upsert_property(db: Session, item: dict, kind: str, year_built: int | None)
             "price_eur": 0.0,
             "area_m2": 0.0,
             "rooms": 0,
-            "price_per_m2": 0.0,
             "url": f"https://www.nehnutelnosti.sk/detail/{ext_id}",
             "title": "Property listing",
+            "year_built": None,
+            "address": None,
+            "lat": None,
+            "lng": None,
         }
-    
-    # Use get_or_create pattern to handle concurrent inserts
-    prop = db.query(Property).filter(Property.external_id == ext_id).first()
-    if not prop:
-        try:
-            # Create new property with validated data
-            prop = Property(**db_data)
-            db.add(prop)
-            db.flush()  # Flush to get the ID, but don't commit yet
-        except Exception:
-            # If duplicate external_id (race condition), fetch existing
-            db.rollback()
-            prop = db.query(Property).filter(Property.external_id == ext_id).first()
-            if not prop:
-                raise
-    
-    # Ensure UUID is set for existing properties that might not have it
-    if prop.uuid is None:
-        from uuid import uuid4
-        prop.uuid = uuid4()
-    
+
+    db_data["uuid"] = uuid4()
     # Mark property as active since we just saw it in the listing
-    prop.is_active = True
-    
-    # Update all fields from validated data
-    for key, value in db_data.items():
-        if key != "external_id":  # Don't update external_id
-            setattr(prop, key, value)
-    
-    # Geocode address if lat/lng are missing
-    if prop.address and (prop.lat is None or prop.lng is None):
-        try:
-            coords = geocode_with_cache(db, prop.address)
-            if coords:
-                prop.lat, prop.lng = coords
-        except Exception:
-            # Silently fail geocoding - not critical
-            pass
+    db_data["is_active"] = True
+    db_data["last_seen_at"] = seen_at
+    return db_data
+
+
+_URL_PATHS = {
+    "flat": "vysledky/byty/predaj",
+    "house": "vysledky/domy/predaj",
+}
 
 
 def _build_list_url(kind: str, page: int) -> str:
-    # Page 1 redirects to base URL, so skip the page parameter
+    path = _URL_PATHS.get(kind, _URL_PATHS["flat"])
+    # Page 1 redirects to the base URL, so skip the page parameter
     if page == 1:
-        if kind == "house":
-            return f"{BASE_URL}vysledky/domy/predaj"
-        return f"{BASE_URL}vysledky/byty/predaj"
-    if kind == "house":
-        return f"{BASE_URL}vysledky/domy/predaj?page={page}"
-    return f"{BASE_URL}vysledky/byty/predaj?page={page}"
+        return f"{BASE_URL}{path}"
+    return f"{BASE_URL}{path}?page={page}"
 
 
@@ -1,5 +1,7 @@
+import os
+from collections import deque
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, Deque, Dict, Any
 from enum import Enum
 import asyncio
 
@@ -12,8 +14,14 @@ class ScrapingStatus(str, Enum):
 
 
 class ScrapingState:
-    """In-memory state for tracking scraping progress."""
-    
+    """In-memory state for tracking scraping progress.
+
+    Single-writer, many-reader: only the running scrape mutates the fields,
+    so progress counters and logs are written without locking (int/list ops
+    are atomic under the GIL) and readers may observe slightly stale values.
+    The lock is only taken around status transitions.
+    """
+
     def __init__(self):
         self.status: ScrapingStatus = ScrapingStatus.IDLE
         self.current_kind: Optional[str] = None
@@ -24,11 +32,17 @@ class ScrapingState:
         self.start_time: Optional[datetime] = None
         self.end_time: Optional[datetime] = None
         self.error_message: Optional[str] = None
-        self.logs: List[Dict[str, Any]] = []
+        # maxlen evicts the oldest entry on append; no periodic slice copies
+        self.logs: Deque[Dict[str, Any]] = deque(maxlen=1000)
+        # Debug entries are the high-volume per-item ones; keep them off by
+        # default so add_log skips the timestamp/dict work entirely
+        self.debug_enabled: bool = os.getenv("SCRAPE_DEBUG_LOGS", "0") == "1"
         self.lock = asyncio.Lock()
     
     def add_log(self, level: str, message: str, timestamp: Optional[datetime] = None):
-        """Add a log entry."""
+        """Add a log entry. Debug entries are dropped unless debug_enabled."""
+        if level == "debug" and not self.debug_enabled:
+            return
         if timestamp is None:
             timestamp = datetime.now()
         log_entry = {
@@ -37,9 +51,6 @@ class ScrapingState:
             "message": message
         }
         self.logs.append(log_entry)
-        # Keep only last 1000 logs
-        if len(self.logs) > 1000:
-            self.logs = self.logs[-1000:]
     
     def reset(self):
         """Reset state for a new scraping run."""
@@ -1,3 +1,4 @@
+import lxml.html
 import pytest
 from app.services.scraper.parse import (
     parse_listings,
@@ -40,22 +41,30 @@ def test_parse_listings_empty():
     assert result == []
 
 
-def test_parse_listings_sample():
-    # Sample HTML structure (simplified)
-    html = """
-    <div class="MuiGrid2-root MuiGrid2-container MuiGrid2-direction-xs-row mui-1qrjc3g">
-        <a href="/detail/ABC123/test">
-            <h2 class="MuiTypography-root MuiTypography-h4 MuiTypography-noWrap mui-ibivuk">Test Property</h2>
-            <p class="MuiTypography-root MuiTypography-body2 MuiTypography-noWrap mui-1jfsjra">Bratislava</p>
-            <p class="MuiTypography-root MuiTypography-body2.mui-5c21y4">86 m²</p>
-            <p class="MuiTypography-root MuiTypography-body2.MuiTypography-noWrap.mui-1u9yyor">3 izbový byt</p>
-            <p class="MuiTypography-root MuiTypography-h5.mui-ce5ndv">148 000 €</p>
-            <p class="MuiTypography-root MuiTypography-label1.mui-u7akpj">1 720,93 €/m²</p>
-        </a>
-    </div>
-    """
+# Sample HTML structure (simplified)
+SAMPLE_HTML = """
+<div class="MuiGrid2-root MuiGrid2-container MuiGrid2-direction-xs-row mui-1qrjc3g">
+    <a href="/detail/ABC123/test">
+        <h2 class="MuiTypography-root MuiTypography-h4 MuiTypography-noWrap mui-ibivuk">Test Property</h2>
+        <p class="MuiTypography-root MuiTypography-body2 MuiTypography-noWrap mui-1jfsjra">Bratislava</p>
+        <p class="MuiTypography-root MuiTypography-body2.mui-5c21y4">86 m²</p>
+        <p class="MuiTypography-root MuiTypography-body2.MuiTypography-noWrap.mui-1u9yyor">3 izbový byt</p>
+        <p class="MuiTypography-root MuiTypography-h5.mui-ce5ndv">148 000 €</p>
+        <p class="MuiTypography-root MuiTypography-label1.mui-u7akpj">1 720,93 €/m²</p>
+    </a>
+</div>
+"""
+
+
+@pytest.fixture(scope="module")
+def sample_tree():
+    # Parsed once per module; parse_listings accepts the pre-parsed tree
+    return lxml.html.fromstring(SAMPLE_HTML)
+
+
+def test_parse_listings_sample(sample_tree):
     # Note: This test would need actual HTML structure to work properly
     # For now, just verify the function doesn't crash
-    result = parse_listings(html)
+    result = parse_listings(sample_tree)
     assert isinstance(result, list)
 